@@ -1,84 +1,210 @@
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+import json
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_STATIC_HEADERS = MappingProxyType({"location": 'new_york'})
+
+
+@lru_cache(maxsize=256)
+def _collection_path(collection_name: str) -> str:
+    return 'incollection/' + collection_name
+
+
+def _needs_json(value) -> bool:
+    # requests would send only the keys of a dict (also inside a list) and spell booleans True/False;
+    # lists of plain scalars keep going out as repeated keys, and other scalars are str()'d by requests
+    if isinstance(value, (dict, bool)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return any(isinstance(item, (dict, list, tuple)) for item in value)
+    return False
+
+
+def _encode_params(query_params: Dict) -> Dict:
+    return {key: json.dumps(value) if _needs_json(value) else value for key, value in query_params.items()}
+
+
+def _error_message(result: Dict) -> str:
+    errors = result.get("errors")
+    if not errors:
+        return "API call failed. Please check your internet connection or try again later"
+    if not (isinstance(errors, list) and isinstance(errors[0], dict)):
+        return str(errors)
+    return errors[0].get('message') or "Please provide the necessary requirements or try again later"
+
+
+class _CappedRetry(Retry):
+    # urllib3 1.26 sleeps for whatever Retry-After says; clamp it so a large value can't stall the caller
+    MAX_RETRY_AFTER = 30.0
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, self.MAX_RETRY_AFTER)
+
+
+class ShipthisAPIError(Exception):
+    def __init__(self, message: str, status_code: int=None) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
 class ShipthisAPI:
     base_api_endpoint = 'https://api.shipthis.co/api/v3/'
 
-    def __init__(self, organisation: str, x_api_key:str, user_type='employee', region_id: str=None, location_id: str=None) -> None:
+    def __init__(self, organisation: str, x_api_key:str, user_type='employee', region_id: str=None, location_id: str=None, pool_maxsize: int=100, max_retries: int=3, backoff_factor: float=0.5, connect_timeout: float=5.0, read_timeout: float=30.0) -> None:
+        self._session = requests.Session()
+        self._session.headers.update(_STATIC_HEADERS)
+        # credentials live on the session headers; the properties below read and write them there
         self.x_api_key = x_api_key
         self.organisation_id = organisation
         self.user_type = user_type
         self.region_id = region_id
         self.location_id = location_id
+        # per attempt, in seconds; requests has no session-wide timeout so it is passed on every call
+        self._timeout = (connect_timeout, read_timeout)
+        # retry idempotent calls on rate limiting and transient server errors, honouring Retry-After up to
+        # MAX_RETRY_AFTER; worst case a call spends max_retries * 30s waiting plus (max_retries + 1) connect and read timeouts
+        retries = _CappedRetry(total=max_retries, backoff_factor=backoff_factor, status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retries)
+        # both schemes, so an overridden http:// base_api_endpoint keeps the pool and retry settings
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
 
     
     def set_region_location(self, region_id, location_id):
         self.region_id = region_id
         self.location_id = location_id
+
+    @property
+    def x_api_key(self) -> str:
+        return self._session.headers["x-api-key"]
+
+    @x_api_key.setter
+    def x_api_key(self, value: str) -> None:
+        self._session.headers["x-api-key"] = value
+
+    @property
+    def organisation_id(self) -> str:
+        return self._session.headers["organisation"]
+
+    @organisation_id.setter
+    def organisation_id(self, value: str) -> None:
+        self._session.headers["organisation"] = value
+
+    @property
+    def user_type(self) -> str:
+        return self._session.headers["user_type"]
+
+    @user_type.setter
+    def user_type(self, value: str) -> None:
+        self._session.headers["user_type"] = value
     
-    def _make_request(self, method: str, path: str, query_params: str=None, request_data=None) ->  None:
-        headers = {
-            "x-api-key": self.x_api_key,
-            "organisation": self.organisation_id,
-            "user_type": self.user_type,
-            "location": 'new_york'
-        }
-        fetched_response = requests.request(method, self.base_api_endpoint + path, data=request_data or {}, headers=headers, params=query_params)
-        result = fetched_response.json()
-        
-        if fetched_response.status_code == 200:
-            if result.get("success"):
-                return result.get("data")
-            else:
-                error_message = result.get("errors") or "API call failed. Please check your internet connection or try again later"
-                return error_message[0].get('message') if error_message[0].get('message') else "Please provide the necessary requirements or try again later"
-        else:
-            return "Internal Server error, please try again later"
-
-    def info(self) ->  Dict:
+    def _make_request(self, method: str, path: str, query_params: Dict=None, request_data=None) ->  Optional[Dict]:
+        if query_params:
+            query_params = _encode_params(query_params)
+        try:
+            fetched_response = self._session.request(method, self.base_api_endpoint + path, json=request_data, params=query_params, timeout=self._timeout)
+        except requests.RequestException as error:
+            # timeouts, connection errors and exhausted retries; no HTTP status to report
+            raise ShipthisAPIError(str(error)) from error
+        status_code = fetched_response.status_code
+        is_success = 200 <= status_code < 300
+        if is_success and not fetched_response.content:
+            # e.g. 204 No Content
+            return None
+        try:
+            result = fetched_response.json()
+        except ValueError:
+            # non-JSON body, e.g. an HTML error page from a gateway
+            result = None
+
+        if not isinstance(result, dict) or status_code >= 500:
+            raise ShipthisAPIError("Internal Server error, please try again later", status_code)
+        if is_success and result.get("success"):
+            return result.get("data")
+        raise ShipthisAPIError(_error_message(result), status_code)
+
+    def close(self) -> None:
+        self._session.close()
+
+    def __enter__(self) -> 'ShipthisAPI':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def info(self) ->  Optional[Dict]:
         info_resp = self._make_request('GET', 'auth/info')
         return info_resp
     
     
 
-    def get_one_item(self, collection_name: str, params=None) ->  Dict:
-        resp = self._make_request('GET', 'incollection/' + collection_name)
-        if  isinstance(resp, dict):
-            if resp.get("items"):
-                # return first elem
-                return resp.get("items")[0]
-        else:
-            return resp
-
-    def get_list(self, collection_name: str, params=None) -> List[Dict] or str:
-        get_list_response = self._make_request('GET', 'incollection/' + collection_name, params)
-        if isinstance(get_list_response, str):
-            return get_list_response
-        else:
-            if get_list_response.get("items", False):
-                return get_list_response.get("items", [])
-            else:
-                return get_list_response
-
-
-    def create_item(self, collection_name: str, data=None) ->  Dict:
-        resp = self._make_request('POST', 'incollection/' + collection_name, request_data={"reqbody": data})
-        if  isinstance(resp, dict):
-            if resp.get("data"):
-                return resp.get("data")
-        else:
-            return resp
-
-    def update_item(self, collection_name: str, object_id: str, updated_data=None) ->  Dict:
-        resp = self._make_request('PUT', 'incollection/' + collection_name + '/' + object_id, request_data={"reqbody": updated_data})
-        if  isinstance(resp, dict):
-            if resp.get("data"):
-                return resp.get("data")
-        else:
-            return resp
-
-    def delete_item(self, collection_name: str, object_id: str) -> Dict:
-        resp = self._make_request('DELETE', 'incollection/' + collection_name + '/' + object_id)
-        # if  isinstance(resp, str):
-        #     return resp
-        # else:
-        return resp
\ No newline at end of file
+    def get_one_item(self, collection_name: str, params=None) ->  Optional[Dict]:
+        items = self.get_list(collection_name, params)
+        # return first elem
+        return items[0] if items else None
+
+    def get_list(self, collection_name: str, params=None) -> List[Dict]:
+        resp = self._make_request('GET', _collection_path(collection_name), params)
+        return (resp.get("items") if isinstance(resp, dict) else None) or []
+
+    def get_many(self, specs: List[Tuple[str, Dict]], max_workers: int=20) -> List:
+        # specs are (collection_name, params) pairs; results come back in the same order
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda spec: self.get_list(*spec), specs))
+
+    def iter_list(self, collection_name: str, params=None, page_size: int=500) -> Iterator[Dict]:
+        # fetches one page at a time so only page_size items are held in memory;
+        # count and page are driven by iter_list, so they may not be passed in params
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        if params and ("count" in params or "page" in params):
+            raise ValueError("iter_list sets count and page itself, use page_size instead")
+        page = 1
+        fetched = 0
+        previous_items = None
+        while True:
+            resp = self._make_request('GET', _collection_path(collection_name), {**(params or {}), "count": page_size, "page": page})
+            if not isinstance(resp, dict):
+                return
+            items = resp.get("items") or []
+            # stop on an empty page, or a repeated one if the server ignores page
+            if not items or items == previous_items:
+                return
+            yield from items
+            fetched += len(items)
+            total_count = resp.get("total_count")
+            if total_count is not None and fetched >= total_count:
+                return
+            previous_items = items
+            page += 1
+
+    def create_item(self, collection_name: str, data=None) ->  Optional[Dict]:
+        resp = self._make_request('POST', _collection_path(collection_name), request_data={"reqbody": data})
+        return resp.get("data") if isinstance(resp, dict) else resp
+
+    def update_item(self, collection_name: str, object_id: str, updated_data=None) ->  Optional[Dict]:
+        resp = self._make_request('PUT', _collection_path(collection_name) + '/' + object_id, request_data={"reqbody": updated_data})
+        return resp.get("data") if isinstance(resp, dict) else resp
+
+    def bulk_update_items(self, collection_name: str, updates: Dict[str, Dict], max_workers: int=20) -> Dict[str, Union[Optional[Dict], ShipthisAPIError]]:
+        # updates maps object_id -> updated_data; the result maps each object_id, in input order, to its
+        # updated data or to the ShipthisAPIError its update raised, so partial failures don't hide applied writes
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {object_id: executor.submit(self.update_item, collection_name, object_id, updated_data) for object_id, updated_data in updates.items()}
+            for object_id, future in futures.items():
+                try:
+                    results[object_id] = future.result()
+                except ShipthisAPIError as error:
+                    results[object_id] = error
+        return results
+
+    def delete_item(self, collection_name: str, object_id: str) -> Optional[Dict]:
+        return self._make_request('DELETE', _collection_path(collection_name) + '/' + object_id)
\ No newline at end of file
@@ -1,2 +0,0 @@
-# __variables__ with double-quoted values will be available in setup.py
-__version__ = "0.1.1"
\ No newline at end of file